@@ -8,97 +8,130 @@ Usage:
 """
 import sys
 import os
+import signal
 import json
-try:
-    from pypdf import PdfReader
-except ImportError:
-    import sys
-    import subprocess
-    print("Debug: sys.path:", sys.path, file=sys.stderr)
-    try:
-        print("Debug: pip freeze:", subprocess.check_output([sys.executable, "-m", "pip", "freeze"]).decode(), file=sys.stderr)
-    except Exception as e:
-        print("Debug: failed to run pip freeze:", e, file=sys.stderr)
-    raise
-
-# Import converter modules
-import pdf_to_docx
-import pdf_to_excel
-import pdf_to_ppt
-import pdf_to_jpg
-import pdf_to_jpg_fast
+import importlib
+import functools
+
+# Converter modules are imported lazily: each one pulls in heavy dependencies
+# (pdfplumber, pandas, rapidocr, python-pptx, ...) and a request only needs one.
+# Maps action -> (module name, function name)
+CONVERTERS = {
+    "pdf_to_docx": ("pdf_to_docx", "convert"),
+    "pdf_to_excel": ("pdf_to_excel", "convert"),
+    "pdf_to_ppt": ("pdf_to_ppt", "convert"),
+    "pdf_to_jpg": ("pdf_to_jpg_fast", "convert"),
+    "pdf_to_jpg_fast": ("pdf_to_jpg_fast", "convert"),
+}
 
 # Maximum file size: 100MB
 MAX_FILE_SIZE = 100 * 1024 * 1024
 
+# Directories searched for relative paths that don't exist as given (Cherry Studio compatibility)
+SEARCH_DIRS = (
+    os.getcwd(),  # Current working directory
+    os.path.join(os.getcwd(), "uploads"),  # Common upload directory
+    os.path.join(os.getcwd(), "files"),  # Another common directory
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test"),  # Test directory
+)
+
+# Bytes read from each end of the file to look for the PDF header and %%EOF marker
+SNIFF_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=None)
+def load_converter(action: str):
+    """
+    Import the module for an action on first use and return its convert function.
+    """
+    module_name, func_name = CONVERTERS[action]
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name)
+
 
-def check_pdf_validity(pdf_path: str) -> tuple[dict | None, str]:
+def check_pdf_validity(pdf_path: str) -> tuple[dict | None, str, object | None]:
     """
     Check if PDF file is valid, not encrypted, and within size limit.
 
     For Cherry Studio compatibility: tries to resolve relative paths and common upload directories.
 
     Returns:
-        (error_dict, resolved_path): error dict or None, and resolved file path
+        (error_dict, resolved_path, doc): error dict or None, resolved file path, and
+        on success the opened fitz.Document (the caller must close it)
     """
     original_path = pdf_path
 
     # Cherry Studio compatibility: try to resolve the file path
     if not os.path.exists(pdf_path):
         # Try common Cherry Studio upload directories and relative paths
-        possible_paths = [
-            pdf_path,  # Original path
-            os.path.join(os.getcwd(), pdf_path),  # Current working directory
-            os.path.join(os.getcwd(), "uploads", pdf_path),  # Common upload directory
-            os.path.join(os.getcwd(), "files", pdf_path),  # Another common directory
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test", pdf_path),  # Test directory
-        ]
-
-        # Try each possible path
-        resolved_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                resolved_path = path
-                break
+        resolved_path = next(
+            (path for path in (os.path.join(base, pdf_path) for base in SEARCH_DIRS) if os.path.exists(path)),
+            None
+        )
 
         if resolved_path is None:
-            return ({"success": False, "error": f"File not found: {pdf_path}. Searched in: {', '.join(possible_paths[:3])}..."}, original_path)
+            searched = [pdf_path] + [os.path.join(base, pdf_path) for base in SEARCH_DIRS[:2]]
+            return ({"success": False, "error": f"File not found: {pdf_path}. Searched in: {', '.join(searched)}..."}, original_path, None)
 
         # Update the path to the resolved one for further processing
         pdf_path = resolved_path
 
-    # Check file size
-    file_size = os.path.getsize(pdf_path)
-    if file_size > MAX_FILE_SIZE:
-        size_mb = file_size / (1024 * 1024)
+    # Check file size and sniff the header/trailer with a single open,
+    # so obviously broken files are rejected before the full parse
+    try:
+        with open(pdf_path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size > MAX_FILE_SIZE:
+                size_mb = file_size / (1024 * 1024)
+                return ({
+                    "success": False,
+                    "error": f"File size ({size_mb:.1f}MB) exceeds maximum limit (100MB)"
+                }, pdf_path, None)
+
+            head = f.read(SNIFF_SIZE)
+            f.seek(max(0, file_size - SNIFF_SIZE))
+            tail = f.read()
+    except OSError as e:
+        return ({
+            "success": False,
+            "error": f"Cannot read file: {str(e)}"
+        }, pdf_path, None)
+
+    # The header may be preceded by a few junk bytes, so search the whole window
+    if b"%PDF-" not in head or b"%%EOF" not in tail:
         return ({
             "success": False,
-            "error": f"File size ({size_mb:.1f}MB) exceeds maximum limit (100MB)"
-        }, pdf_path)
+            "error": "PDF appears to be corrupted or invalid: missing %PDF- header or %%EOF marker"
+        }, pdf_path, None)
 
     # Check if PDF is encrypted or corrupted
+    # PyMuPDF loads much faster than a full pure-Python parse, and the converters use it anyway
+    import fitz  # PyMuPDF
     try:
-        reader = PdfReader(pdf_path)
-        if reader.is_encrypted:
+        doc = fitz.open(pdf_path)
+        encrypted = doc.needs_pass or doc.is_encrypted
+        # Try to access pages to verify PDF is not corrupted
+        _ = doc.page_count
+        if encrypted:
+            doc.close()
             return ({
                 "success": False,
                 "error": "PDF is encrypted and cannot be converted. Please provide an unencrypted PDF."
-            }, pdf_path)
-        # Try to access pages to verify PDF is not corrupted
-        _ = len(reader.pages)
+            }, pdf_path, None)
     except Exception as e:
         error_msg = str(e).lower()
         if "encrypt" in error_msg:
             return ({
                 "success": False,
                 "error": "PDF is encrypted and cannot be converted. Please provide an unencrypted PDF."
-            }, pdf_path)
+            }, pdf_path, None)
         return ({
             "success": False,
             "error": f"PDF appears to be corrupted or invalid: {str(e)}"
-        }, pdf_path)
+        }, pdf_path, None)
 
-    return (None, pdf_path)
+    # Keep the document open so PyMuPDF-based converters can reuse it
+    return (None, pdf_path, doc)
 
 
 def process_request(request: dict) -> dict:
@@ -109,7 +142,7 @@ def process_request(request: dict) -> dict:
         request: dict with 'action', 'pdf_path', and optional 'output_path'
 
     Returns:
-        dict with conversion result
+        dict (or a converter result object) with conversion result
     """
     action = request.get("action")
     pdf_path = request.get("pdf_path")
@@ -121,53 +154,52 @@ def process_request(request: dict) -> dict:
     if not pdf_path:
         return {"success": False, "error": "Missing 'pdf_path' parameter"}
 
-    # Validate PDF file and get resolved path
-    validation_error, resolved_pdf_path = check_pdf_validity(pdf_path)
+    # Validate PDF file and get resolved path and the already-parsed document
+    validation_error, resolved_pdf_path, doc = check_pdf_validity(pdf_path)
     if validation_error:
         return validation_error
 
-    # Use resolved path for conversion
-    pdf_path = resolved_pdf_path
+    try:
+        return _run_converter(request, action, resolved_pdf_path, output_path, doc)
+    finally:
+        doc.close()
+
 
+def _run_converter(request: dict, action: str, pdf_path: str, output_path: str | None, doc) -> dict:
+    """
+    Dispatch a validated request to its converter.
+    PyMuPDF-based converters reuse the open document instead of parsing the file again.
+    """
     # Route to appropriate converter
-    converters = {
-        "pdf_to_docx": pdf_to_docx.convert,
-        "pdf_to_excel": pdf_to_excel.convert,
-        "pdf_to_ppt": pdf_to_ppt.convert,
-        "pdf_to_jpg": pdf_to_jpg.convert,
-        "pdf_to_jpg_fast": pdf_to_jpg_fast.convert,
-    }
-
-    converter = converters.get(action)
-    if not converter:
+    if action not in CONVERTERS:
         return {
             "success": False,
-            "error": f"Unknown action: {action}. Available actions: {', '.join(converters.keys())}"
+            "error": f"Unknown action: {action}. Available actions: {', '.join(CONVERTERS.keys())}"
         }
 
     # Execute conversion
     try:
+        converter = load_converter(action)
+
         # Special handling for specific converters with extra parameters
-        if action == "pdf_to_docx" and request.get("fast_mode"):
-            result = converter(pdf_path, output_path, fast_mode=True)
+        if action == "pdf_to_docx":
+            result = converter(pdf_path, output_path, fast_mode=bool(request.get("fast_mode")),
+                               engine=request.get("engine", "pdf2docx"), doc=doc)
         elif action == "pdf_to_excel":
             pages = request.get("pages", "all")
             use_ocr = request.get("use_ocr", False)  # Default to False for speed
             result = converter(pdf_path, output_path, pages=pages, use_ocr=use_ocr)
-        elif action == "pdf_to_ppt" and request.get("dpi"):
-            result = converter(pdf_path, output_path, request.get("dpi"))
-        elif action == "pdf_to_jpg":
-            # Use fast version for large files or when specified
+        elif action == "pdf_to_ppt":
+            if request.get("dpi"):
+                result = converter(pdf_path, output_path, request.get("dpi"), doc=doc)
+            else:
+                result = converter(pdf_path, output_path, doc=doc)
+        elif action in ("pdf_to_jpg", "pdf_to_jpg_fast"):
             dpi = request.get("dpi", 72)
             quality = request.get("quality", 85)
-
-            # For files > 10MB or DPI < 72, use fast version
-            import os
-            file_size = os.path.getsize(pdf_path)
-            if file_size > 10 * 1024 * 1024 or dpi < 72:
-                result = pdf_to_jpg_fast.convert(pdf_path, output_path, dpi, quality)
-            else:
-                result = converter(pdf_path, output_path, dpi)
+            # pdf_to_jpg keeps annotations like the original renderer did;
+            # pdf_to_jpg_fast skips them for speed
+            result = converter(pdf_path, output_path, dpi, quality, doc=doc, annots=(action == "pdf_to_jpg"))
         else:
             result = converter(pdf_path, output_path)
         return result
@@ -182,6 +214,11 @@ def main():
     """
     Main entry point.
     """
+    # The MCP server sends SIGTERM on timeout. Turn it into SystemExit so
+    # cleanup runs (e.g. subprocess.run kills a running soffice) instead of
+    # the process dying with children still running
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
     # Read JSON from stdin
     input_data = sys.stdin.read().strip()
 
@@ -196,7 +233,9 @@ def main():
         except Exception as e:
             result = {"success": False, "error": f"Unexpected error: {str(e)}"}
 
-    # Output JSON result
+    # Output JSON result; some converters return a result object rather than a dict
+    if not isinstance(result, dict):
+        result = result.to_dict()
     print(json.dumps(result))
 
 
@@ -1,29 +1,837 @@
 """
 PDF to DOCX converter module.
 Uses pdf2docx library to preserve formatting, tables, and images.
+Picks single-process, sharded or batched conversion from the input size.
 """
 import os
+import sys
+import gc
+import contextlib
+import atexit
+import ctypes
+import mmap
+import copy
+import re
+import hashlib
+import uuid
+import mimetypes
+import zipfile
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from dataclasses import dataclass
+import fitz  # PyMuPDF
+from lxml import etree
 from pdf2docx import Converter
 
+# Conversion strategies for convert(mode=...):
+#   single  - one Converter in this process
+#   shard   - page shards converted in parallel processes, then merged
+#   batched - sequential batches with a fresh Converter each, bounding memory
+CONVERT_MODES = ("auto", "single", "shard", "batched")
 
-def convert(pdf_path: str, output_path: str | None = None, fast_mode: bool = False) -> dict:
+# "auto" picks single up to this many pages and bytes, shard up to
+# SHARD_MAX_PAGES, and batched beyond that. Default (non-fast) conversions are
+# never sharded: each shard's Converter only sees its own pages, so analysis
+# that spans pages (sections, tables continuing across a page) is cut at every
+# shard boundary. They stay single up to SHARD_MAX_PAGES.
+SINGLE_MAX_PAGES = 20
+SINGLE_MAX_BYTES = 20 * 1024 * 1024
+SHARD_MAX_PAGES = 200
+
+# Pages per batch in batched mode; peak memory is roughly one batch of pages
+BATCH_PAGE_LIMIT = 50
+
+# Conversion engines for convert(engine=...): pdf2docx keeps layout, tables
+# and images most faithfully; libreoffice runs LibreOffice's native PDF import
+# headless, which is faster on text-heavy documents but less faithful
+ENGINES = ("pdf2docx", "libreoffice")
+
+# LibreOffice executable (looked up on PATH unless overridden) and the time
+# allowed for one conversion, in seconds. The default stays below the 90 s the
+# MCP server (src/index.ts) gives the whole converter process, so a stuck
+# soffice is killed here rather than orphaned when the server gives up
+SOFFICE_PATH = os.environ.get("SOFFICE_PATH", "soffice")
+LIBREOFFICE_TIMEOUT = int(os.environ.get("LIBREOFFICE_TIMEOUT", "75"))
+
+# Below this page count shard mode converts in-process instead of sharding
+PARALLEL_MIN_PAGES = 4
+
+# pdf2docx settings for fast mode: skip lattice/stream table detection, the
+# slowest layout step on table-heavy pages. Tables then come out as positioned
+# text instead of Word tables.
+FAST_MODE_SETTINGS = {
+    "parse_lattice_table": False,
+    "parse_stream_table": False,
+    "extract_stream_table": False,
+    "ignore_page_error": True,
+}
+
+# Upper bound on shard worker processes
+MAX_SHARD_WORKERS = 8
+
+_shard_pool = None
+_shard_pool_lock = threading.Lock()
+
+# Number of open Converters kept for repeated conversions of the same file
+CONVERTER_CACHE_SIZE = 4
+
+# PDFs larger than this are memory-mapped instead of read by path, so the
+# kernel pages them in on demand rather than MuPDF buffering a copy
+MMAP_THRESHOLD = 32 * 1024 * 1024
+
+_converter_cache = OrderedDict()
+_converter_cache_lock = threading.Lock()
+
+# glibc's malloc_trim hands freed heap pages back to the OS; not available on
+# macOS, musl or Windows, where release_memory() only runs the garbage collector
+try:
+    _malloc_trim = ctypes.CDLL("libc.so.6").malloc_trim
+except (OSError, AttributeError):
+    _malloc_trim = None
+
+# OOXML names used when merging DOCX files at the zip level
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+_W_BODY = f"{{{_W_NS}}}body"
+_W_P = f"{{{_W_NS}}}p"
+_W_P_PR = f"{{{_W_NS}}}pPr"
+_W_SECT_PR = f"{{{_W_NS}}}sectPr"
+# Drawing properties; their ids must be unique across the whole document
+_WP_DOC_PR = f"{{{_WP_NS}}}docPr"
+# A namespace declaration in a serialized start tag: prefix (or none), URI
+_NS_DECL = re.compile(rb' xmlns(?::([\w.-]+))?="([^"]*)"')
+# Attributes that hold relationship ids (images, hyperlinks) in document.xml
+_REL_ID_ATTRS = (f"{{{_R_NS}}}embed", f"{{{_R_NS}}}link", f"{{{_R_NS}}}id")
+_DOCUMENT_PART = "word/document.xml"
+_DOCUMENT_RELS = "word/_rels/document.xml.rels"
+_CONTENT_TYPES = "[Content_Types].xml"
+_MEDIA_PREFIX = "word/media/"
+
+# Deflate level for the merged DOCX: XML parts barely shrink further at
+# higher levels, and media (PNG/JPEG) are already compressed so they are stored
+ZIP_COMPRESSLEVEL = 1
+
+
+# Error messages by exception type; anything else is a generic failure
+_ERROR_MESSAGES = {
+    "FileNotFoundError": "File not found: {}",
+    "PermissionError": "Permission denied: {}",
+    "PDFValidationError": "{}",
+}
+
+
+class PDFValidationError(ValueError):
+    """
+    The input PDF is encrypted or damaged and cannot be converted.
+    """
+
+
+@dataclass(slots=True, frozen=True)
+class ConvertResult:
+    """
+    Outcome of a DOCX conversion. Converted to the JSON wire format with
+    to_dict() only when the response is serialized.
+
+    Failures keep the exception type name and args; the error message is
+    only formatted when it is read.
+    """
+    success: bool
+    output_path: str | None = None
+    message: str | None = None
+    error_type: str | None = None
+    error_args: tuple = ()
+
+    @property
+    def error(self) -> str | None:
+        """
+        Human-readable error message, or None on success.
+        """
+        if self.error_type is None:
+            return None
+        # Same rule as str(exception): a single arg as is, several as a tuple
+        args = self.error_args
+        detail = str(args[0]) if len(args) == 1 else str(args) if args else ""
+        return _ERROR_MESSAGES.get(self.error_type, "Conversion failed: {}").format(detail)
+
+    def __str__(self) -> str:
+        return self.message if self.success else self.error
+
+    def to_dict(self) -> dict:
+        """
+        Return the dict sent back to the caller, without unset fields.
+        """
+        if self.success:
+            return {"success": True, "output_path": self.output_path, "message": self.message}
+        return {"success": False, "error": self.error}
+
+
+def _warm():
+    """
+    Shard worker initializer: import the heavy libraries once per worker so
+    conversions don't pay for it (matters under the spawn start method).
+    """
+    import fitz  # noqa: F401
+    import pdf2docx  # noqa: F401
+
+
+def _get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Return the process pool used for shard conversion, starting it on first
+    use. Workers stay up for later conversions and are shut down at exit.
+    """
+    global _shard_pool
+    with _shard_pool_lock:
+        if _shard_pool is None:
+            _shard_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(MAX_SHARD_WORKERS, multiprocessing.cpu_count()),
+                initializer=_warm,
+            )
+            atexit.register(_shard_pool.shutdown)
+        return _shard_pool
+
+
+def _reset_pool():
+    """
+    Drop a pool whose workers died so the next conversion starts a new one.
+    """
+    global _shard_pool
+    with _shard_pool_lock:
+        if _shard_pool is not None:
+            _shard_pool.shutdown(wait=False)
+            _shard_pool = None
+
+
+def release_memory():
+    """
+    Free what a closed Converter left behind: collect garbage, then return
+    the freed heap to the OS so RSS drops in long-running processes.
+    """
+    gc.collect()
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+def open_converter(pdf_path: str):
+    """
+    Open a Converter for pdf_path, memory-mapping files above MMAP_THRESHOLD.
+
+    Returns:
+        (Converter, view) where view is the memoryview over the mapping, or
+        None; pass both to close_converter().
+    """
+    if os.path.getsize(pdf_path) <= MMAP_THRESHOLD:
+        return Converter(pdf_path), None
+
+    fd = os.open(pdf_path, os.O_RDONLY)
+    try:
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    # PyMuPDF reads a memoryview in place; bytes(mm) would copy the file
+    view = memoryview(mm)
+    try:
+        return Converter(stream=view), view
+    except TypeError:
+        # Older pdf2docx has no stream argument, and older PyMuPDF only takes
+        # bytes-like streams it can own; open by path as for small files
+        view.release()
+        mm.close()
+        return Converter(pdf_path), None
+    except Exception:
+        view.release()
+        mm.close()
+        raise
+
+
+def close_converter(cv, view):
+    """
+    Close a Converter from open_converter() and unmap its file, if any.
+    The mapping must outlive the document, so it is released last.
+    """
+    cv.close()
+    if view is not None:
+        mm = view.obj
+        view.release()
+        mm.close()
+    release_memory()
+
+
+@contextlib.contextmanager
+def get_converter(pdf_path: str):
+    """
+    Borrow a Converter for pdf_path from a small process-local LRU cache, so
+    repeated conversions of an unchanged file skip reopening it.
+    Keyed on path, mtime and size; evicted Converters are closed.
+
+    Use as a context manager: the entry is locked while borrowed, so two
+    threads never run one Converter at once, and the pages it parsed are
+    dropped on exit so cached entries only hold the open document.
+    """
+    st = os.stat(pdf_path)
+    key = (os.path.abspath(pdf_path), st.st_mtime_ns, st.st_size)
+
+    while True:
+        evicted = []
+        with _converter_cache_lock:
+            entry = _converter_cache.get(key)
+            if entry is not None:
+                _converter_cache.move_to_end(key)
+            else:
+                cv, view = open_converter(pdf_path)
+                entry = (cv, view, threading.Lock())
+                _converter_cache[key] = entry
+                while len(_converter_cache) > CONVERTER_CACHE_SIZE:
+                    evicted.append(_converter_cache.popitem(last=False)[1])
+
+        # Close evicted entries outside the cache lock, once no one is using them
+        for old_cv, old_view, old_lock in evicted:
+            with old_lock:
+                close_converter(old_cv, old_view)
+        del evicted
+
+        cv, _, lock = entry
+        with lock:
+            # Another thread may have evicted and closed the entry before the
+            # lock was taken; look it up again
+            if cv.fitz_doc.is_closed:
+                continue
+            try:
+                yield cv
+            finally:
+                cv.pages.reset()
+                release_memory()
+            return
+
+
+def convert_range(pdf_path: str, start: int, end: int | None, tmp_out: str, settings: dict | None = None) -> str:
+    """
+    Convert pages [start, end) of a PDF into a standalone DOCX.
+    Top-level so it can run in a worker process or thread.
+    settings are passed through to pdf2docx (see FAST_MODE_SETTINGS).
+    """
+    cv, view = open_converter(pdf_path)
+    try:
+        cv.convert(tmp_out, start=start, end=end, **(settings or {}))
+    finally:
+        close_converter(cv, view)
+        del cv, view
+    return tmp_out
+
+
+def _convert_range_star(args):
+    """
+    Unpack (pdf_path, start, end, tmp_out, settings) for executor.map.
+    """
+    return convert_range(*args)
+
+
+class DocxMerger:
+    """
+    Concatenate DOCX files at the zip level, without python-docx.
+
+    The first file is the base: its parts are copied to the output as-is.
+    The body of each appended file is pulled out of its document.xml with
+    iterparse and added after the merged body so far. The section that was
+    last so far is closed with a section break (pdf2docx's own form: an empty
+    paragraph carrying the sectPr), and the appended file's final section
+    properties become the document's, so every part keeps its page breaks and
+    page setup. The media it references are copied once (deduplicated by
+    content), its relationships re-created and its drawing ids renumbered.
+
+    Body elements are serialized to a spool file as they are merged, so only
+    the part being appended is held in memory; save() streams the spool into
+    document.xml and writes its relationships and the content types.
+
+    The output is built in a temp file next to output_path and only moved into
+    place by save(), so a failed merge never leaves a truncated DOCX behind.
+    Call discard() (a no-op after save()) to clean up on failure.
+    """
+
+    def __init__(self, base_path: str, output_path: str):
+        self._output_path = output_path
+        # Not mkstemp: its 0600 mode would carry over to the final file
+        output_dir, output_name = os.path.split(output_path)
+        self._tmp_path = os.path.join(output_dir, f".{output_name}.{uuid.uuid4().hex[:8]}.tmp")
+        self._zip = zipfile.ZipFile(self._tmp_path, "x", zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL)
+        self._media = {}  # sha1 of content -> part name, for deduplication
+        self._names = set()
+
+        try:
+            self._copy_base(base_path)
+        except Exception:
+            self.discard()
+            raise
+
+    def _copy_base(self, base_path: str):
+        """
+        Copy the base file's parts to the output and parse the parts that are
+        rewritten by save().
+        """
+        with zipfile.ZipFile(base_path) as src:
+            for info in src.infolist():
+                name = info.filename
+                data = src.read(name)
+                if name == _DOCUMENT_PART:
+                    self._document = etree.fromstring(data)
+                elif name == _DOCUMENT_RELS:
+                    self._rels = etree.fromstring(data)
+                elif name == _CONTENT_TYPES:
+                    self._content_types = etree.fromstring(data)
+                else:
+                    self._write(name, data)
+                    if name.startswith(_MEDIA_PREFIX):
+                        self._media[hashlib.sha1(data).hexdigest()] = name
+                self._names.add(name)
+
+        self._body = self._document.find(_W_BODY)
+        self._rel_ids = {rel.get("Id") for rel in self._rels}
+        doc_pr_ids = [int(el.get("id")) for el in self._body.iter(_WP_DOC_PR) if el.get("id", "").isdigit()]
+        self._next_doc_pr_id = max(doc_pr_ids, default=0) + 1
+
+        # Move the base body out to the spool; the document tree keeps only
+        # the skeleton around <w:body>. The body-level section properties are
+        # held aside because they must be written last.
+        self._spool = tempfile.TemporaryFile()
+        self._sect_pr = None
+        for child in list(self._body):
+            self._body.remove(child)
+            if child.tag == _W_SECT_PR:
+                self._sect_pr = child
+            else:
+                self._spool_write(child)
+
+    def _serialize(self, element) -> bytes:
+        """
+        Serialize a body element. Namespace declarations that the document
+        element already makes are dropped from its start tag.
+        """
+        data = etree.tostring(element, encoding="UTF-8")
+        end = data.index(b">")
+        nsmap = self._document.nsmap
+
+        def keep(match):
+            prefix = match.group(1).decode() if match.group(1) else None
+            return b"" if nsmap.get(prefix) == match.group(2).decode() else match.group(0)
+
+        return _NS_DECL.sub(keep, data[:end]) + data[end:]
+
+    def _spool_write(self, element):
+        """
+        Append a body element to the spool.
+        """
+        self._spool.write(self._serialize(element))
+        self._extensions = {d.get("Extension").lower() for d in self._content_types if d.get("Extension")}
+
+    def _write(self, name: str, data: bytes):
+        """
+        Write a part to the output, storing media uncompressed.
+        """
+        if name.startswith(_MEDIA_PREFIX):
+            self._zip.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+        else:
+            self._zip.writestr(name, data)
+
+    def _add_rel(self, rel_type: str, target: str, external: bool = False) -> str:
+        """
+        Add a relationship to the merged document.xml and return its id.
+        """
+        n = len(self._rel_ids) + 1
+        while f"rId{n}" in self._rel_ids:
+            n += 1
+        rel_id = f"rId{n}"
+        self._rel_ids.add(rel_id)
+
+        rel = etree.SubElement(self._rels, f"{{{_PKG_REL_NS}}}Relationship")
+        rel.set("Id", rel_id)
+        rel.set("Type", rel_type)
+        rel.set("Target", target)
+        if external:
+            rel.set("TargetMode", "External")
+        return rel_id
+
+    def _add_media(self, data: bytes, ext: str) -> str:
+        """
+        Copy a media file into the output (once per distinct content) and
+        return its part name.
+        """
+        digest = hashlib.sha1(data).hexdigest()
+        if digest in self._media:
+            return self._media[digest]
+
+        n = len(self._media) + 1
+        while f"{_MEDIA_PREFIX}image{n}{ext}" in self._names:
+            n += 1
+        name = f"{_MEDIA_PREFIX}image{n}{ext}"
+        self._write(name, data)
+        self._names.add(name)
+        self._media[digest] = name
+
+        if ext[1:].lower() not in self._extensions:
+            default = etree.SubElement(self._content_types, f"{{{_CT_NS}}}Default")
+            default.set("Extension", ext[1:].lower())
+            default.set("ContentType", mimetypes.guess_type(name)[0] or "application/octet-stream")
+            self._extensions.add(ext[1:].lower())
+        return name
+
+    def append(self, path: str):
+        """
+        Append the body of the DOCX at path.
+        """
+        with zipfile.ZipFile(path) as src:
+            src_rels = {rel.get("Id"): rel for rel in etree.fromstring(src.read(_DOCUMENT_RELS))}
+            rel_map = {}
+
+            with src.open(_DOCUMENT_PART) as f:
+                for _, body in etree.iterparse(f, events=("end",), tag=_W_BODY):
+                    self._end_section()
+                    sect_pr = None
+                    for child in body:
+                        if child.tag == _W_SECT_PR:
+                            sect_pr = child
+                            continue
+                        self._relink(child, src, src_rels, rel_map)
+                        self._spool_write(child)
+
+                    # The appended part's last section is now the document's
+                    if sect_pr is not None:
+                        self._relink(sect_pr, src, src_rels, rel_map)
+                        self._sect_pr = sect_pr
+
+    def _end_section(self):
+        """
+        Close the current last section with a section break, so appended
+        content starts on a new page and the section keeps its page setup.
+        """
+        if self._sect_pr is None:
+            return
+        paragraph = etree.Element(_W_P, nsmap={"w": _W_NS})
+        etree.SubElement(paragraph, _W_P_PR).append(copy.deepcopy(self._sect_pr))
+        self._spool_write(paragraph)
+
+    def _relink(self, element, src, src_rels: dict, rel_map: dict):
+        """
+        Re-create the relationships referenced inside element on the merged
+        document and rewrite the ids. Drawing ids (docPr) are renumbered too:
+        every part numbers its drawings from 1, and duplicates make Word
+        report unreadable content.
+        """
+        for el in element.iter():
+            if el.tag == _WP_DOC_PR:
+                el.set("id", str(self._next_doc_pr_id))
+                self._next_doc_pr_id += 1
+            for attr in _REL_ID_ATTRS:
+                old_id = el.get(attr)
+                if old_id is None or old_id not in src_rels:
+                    continue
+                if old_id not in rel_map:
+                    rel = src_rels[old_id]
+                    rel_type, target = rel.get("Type"), rel.get("Target")
+                    if rel.get("TargetMode") == "External":
+                        rel_map[old_id] = self._add_rel(rel_type, target, external=True)
+                    elif not target.startswith("media/"):
+                        # Shared parts (styles, numbering, ...) come from the base
+                        rel_map[old_id] = next(
+                            (r.get("Id") for r in self._rels
+                             if r.get("Type") == rel_type and r.get("Target") == target),
+                            old_id)
+                    else:
+                        data = src.read(f"word/{target}")
+                        name = self._add_media(data, os.path.splitext(target)[1])
+                        rel_map[old_id] = self._add_rel(rel_type, name[len("word/"):])
+                el.set(attr, rel_map[old_id])
+
+    def save(self):
+        """
+        Write document.xml, its relationships and the content types, close the
+        output and move it to output_path.
+        """
+        # Serialize the skeleton with a marker where the body content goes
+        marker = f"body-{uuid.uuid4().hex}"
+        self._body.append(etree.Comment(marker))
+        skeleton = etree.tostring(self._document, xml_declaration=True, encoding="UTF-8", standalone=True)
+        head, tail = skeleton.split(f"<!--{marker}-->".encode())
+
+        with self._zip.open(_DOCUMENT_PART, "w") as f:
+            f.write(head)
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, f)
+            if self._sect_pr is not None:
+                f.write(self._serialize(self._sect_pr))
+            f.write(tail)
+        self._spool.close()
+
+        for name, root in ((_DOCUMENT_RELS, self._rels),
+                           (_CONTENT_TYPES, self._content_types)):
+            self._zip.writestr(name, etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True))
+        self._zip.close()
+        move_file(self._tmp_path, self._output_path)
+
+    def discard(self):
+        """
+        Close and remove the unfinished output, if save() has not moved it yet.
+        """
+        if getattr(self, "_spool", None) is not None:
+            self._spool.close()
+        self._zip.close()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+
+def merge_docx(part_paths: list, output_path: str):
+    """
+    Concatenate DOCX files in order into output_path.
+    """
+    merger = DocxMerger(part_paths[0], output_path)
+    try:
+        for path in part_paths[1:]:
+            merger.append(path)
+        merger.save()
+    finally:
+        merger.discard()
+
+
+def _probe_pdf(pdf_path: str) -> int:
+    """
+    Reject encrypted or damaged PDFs before a Converter parses them, and
+    return the page count. fitz.open only reads the trailer and xref; pages
+    are loaded on access, so this is cheap even for very large files.
+
+    Raises:
+        PDFValidationError: if the PDF is encrypted or cannot be opened
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except RuntimeError as e:
+        raise PDFValidationError(f"PDF appears to be corrupted or invalid: {str(e)}") from e
+
+    with doc:
+        if doc.needs_pass or doc.is_encrypted:
+            raise PDFValidationError("PDF is encrypted and cannot be converted. Please provide an unencrypted PDF.")
+        return doc.page_count
+
+
+def select_mode(total_pages: int, file_size: int, fast_mode: bool = False) -> str:
+    """
+    Pick a conversion strategy for a PDF of this size (see CONVERT_MODES).
+    """
+    if total_pages > SHARD_MAX_PAGES:
+        return "batched"
+    if not fast_mode or (total_pages <= SINGLE_MAX_PAGES and file_size < SINGLE_MAX_BYTES):
+        return "single"
+    return "shard"
+
+
+def _convert_single(pdf_path: str, output_path: str, settings: dict | None):
+    """
+    Convert the whole PDF with one Converter in this process.
+    """
+    if settings:
+        convert_range(pdf_path, 0, None, output_path, settings)
+    else:
+        # The cached Converter stays open for later requests on the same file
+        with get_converter(pdf_path) as cv:
+            cv.convert(output_path)
+
+
+def _convert_sharded(pdf_path: str, output_path: str, total_pages: int, settings: dict | None):
+    """
+    Split the pages into one contiguous shard per core, convert the shards in
+    parallel processes and merge them in page order.
+    """
+    shard_count = min(MAX_SHARD_WORKERS, multiprocessing.cpu_count(), total_pages)
+    if total_pages < PARALLEL_MIN_PAGES or shard_count < 2:
+        _convert_single(pdf_path, output_path, settings)
+        return
+
+    chunk = -(-total_pages // shard_count)  # ceil division
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shard_args = [
+            (pdf_path, start, min(start + chunk, total_pages),
+             os.path.join(temp_dir, f"part_{i}.docx"), settings)
+            for i, start in enumerate(range(0, total_pages, chunk))
+        ]
+        try:
+            part_paths = list(_get_pool().map(_convert_range_star, shard_args))
+        except BrokenProcessPool:
+            _reset_pool()
+            raise
+        merge_docx(part_paths, output_path)
+
+
+def _convert_batched(pdf_path: str, output_path: str, total_pages: int, settings: dict | None, page_limit: int) -> int:
+    """
+    Convert in batches of page_limit pages with a fresh Converter per batch,
+    appending each batch to the output. Peak memory is bounded by the batch
+    size rather than the document.
+
+    Returns:
+        Number of batches converted
+    """
+    if total_pages <= page_limit:
+        _convert_single(pdf_path, output_path, settings)
+        return 1
+
+    # The next batch converts in a worker thread while the previous one is
+    # merged, so the merge hides behind conversion; at most two batches
+    # (one converting, one merging) are in memory at a time. DocxMerger
+    # spools merged body content to disk, keeping only the relationships and
+    # the document skeleton in memory.
+    batches = [(start, min(start + page_limit, total_pages)) for start in range(0, total_pages, page_limit)]
+    batch_count = len(batches)
+    merger = None
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            batch_paths = [os.path.join(temp_dir, f"batch_{i}.docx") for i in range(batch_count)]
+            pending = executor.submit(convert_range, pdf_path, *batches[0], batch_paths[0], settings)
+
+            for i, (start, end) in enumerate(batches):
+                # convert_range closes its Converter and releases its memory
+                # before the result is returned
+                batch_path = pending.result()
+
+                if i + 1 < batch_count:
+                    pending = executor.submit(convert_range, pdf_path, *batches[i + 1], batch_paths[i + 1], settings)
+
+                if merger is None:
+                    merger = DocxMerger(batch_path, output_path)
+                else:
+                    merger.append(batch_path)
+                os.remove(batch_path)
+
+                print(f"[INFO] Converted batch {i + 1}/{batch_count} (pages {start + 1}-{end} of {total_pages})",
+                      file=sys.stderr, flush=True)
+
+        merger.save()
+    finally:
+        # Removes the partial output if a batch failed; a no-op after save()
+        if merger is not None:
+            merger.discard()
+    return batch_count
+
+
+def move_file(src: str, dst: str):
+    """
+    Move src to dst: a rename on the same filesystem, otherwise an in-kernel
+    sendfile copy (shutil.copyfile where sendfile is unavailable) and unlink.
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except OSError:
+        pass
+
+    if hasattr(os, "sendfile"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                size = os.fstat(fsrc.fileno()).st_size
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            if offset == size:
+                os.unlink(src)
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+    os.unlink(src)
+
+
+def _kill_process_group(proc: subprocess.Popen):
+    """
+    Kill a process started with start_new_session=True and its children.
+    """
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.kill()
+    proc.wait()
+
+
+def _convert_libreoffice(pdf_path: str, output_path: str):
+    """
+    Convert with LibreOffice headless (Writer's PDF import, DOCX export).
+    Each call uses its own profile directory so conversions can run concurrently.
+    """
+    soffice = shutil.which(SOFFICE_PATH)
+    if soffice is None:
+        raise RuntimeError(f"LibreOffice not found: {SOFFICE_PATH}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        profile_uri = "file://" + os.path.abspath(os.path.join(temp_dir, "profile")).replace(os.sep, "/")
+        cmd = [
+            soffice, "--headless", "--norestore",
+            f"-env:UserInstallation={profile_uri}",
+            "--infilter=writer_pdf_import",
+            "--convert-to", "docx:MS Word 2007 XML",
+            "--outdir", temp_dir,
+            pdf_path,
+        ]
+        # soffice forks soffice.bin, so it runs in its own session and the
+        # whole process group is killed on timeout or interruption
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                start_new_session=True)
+        try:
+            stdout, stderr = proc.communicate(timeout=LIBREOFFICE_TIMEOUT)
+        except BaseException as e:
+            _kill_process_group(proc)
+            if isinstance(e, subprocess.TimeoutExpired):
+                raise RuntimeError(f"LibreOffice timed out after {LIBREOFFICE_TIMEOUT}s")
+            raise
+
+        converted = os.path.join(temp_dir, os.path.splitext(os.path.basename(pdf_path))[0] + ".docx")
+        if proc.returncode != 0 or not os.path.isfile(converted):
+            raise RuntimeError(f"LibreOffice failed (exit code {proc.returncode}): {(stderr or stdout).strip()}")
+        move_file(converted, output_path)
+
+
+def convert(pdf_path: str, output_path: str | None = None, fast_mode: bool = False,
+            mode: str = "auto", page_limit: int = BATCH_PAGE_LIMIT, engine: str = "pdf2docx",
+            doc=None) -> ConvertResult:
     """
     Convert PDF to DOCX format.
 
     Args:
         pdf_path: Path to the input PDF file
         output_path: Optional output path. If not provided, uses same directory as PDF.
-        fast_mode: If True, uses faster but less accurate conversion settings
+        fast_mode: If True, skips table detection (FAST_MODE_SETTINGS); tables
+                   become plain text
+        mode: One of CONVERT_MODES. "auto" picks from the page count and file
+              size (see select_mode)
+        page_limit: Pages per batch in "batched" mode
+        engine: One of ENGINES. fast_mode, mode and page_limit only apply to pdf2docx
+        doc: Optional fitz.Document already opened and checked by the caller;
+             its page count is reused instead of probing the file again
 
     Returns:
-        dict with status, output_path, and message
+        ConvertResult with status, output_path, and message
     """
     try:
-        if not os.path.exists(pdf_path):
-            return {
-                "success": False,
-                "error": f"PDF file not found: {pdf_path}"
-            }
+        if mode not in CONVERT_MODES:
+            raise ValueError(f"Unknown mode: {mode}. Expected one of {', '.join(CONVERT_MODES)}")
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}. Expected one of {', '.join(ENGINES)}")
+
+        # One stat instead of exists() + open; a missing or unreadable file
+        # raises here and is reported by the handlers below
+        file_size = os.stat(pdf_path).st_size
 
         # Generate output path if not provided
         if not output_path:
@@ -32,32 +840,59 @@ def convert(pdf_path: str, output_path: str | None = None, fast_mode: bool = Fal
 
         # Ensure output directory exists
         output_dir = os.path.dirname(output_path)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        # Convert PDF to DOCX with performance options
-        cv = Converter(pdf_path)
-
-        if fast_mode:
-            # Fast mode: use multi-processing for better performance
-            import multiprocessing
-            cpu_count = min(multiprocessing.cpu_count(), 4)  # Limit to 4 cores max
-            cv.convert(output_path, start=0, end=None, pages=None,
-                      multi_processing=True, cpu_count=cpu_count)
-        else:
-            # Normal mode: full conversion with all features
-            cv.convert(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        # Fail fast on encrypted or damaged input, before any Converter parses it
+        total_pages = doc.page_count if doc is not None else _probe_pdf(pdf_path)
+
+        if engine == "libreoffice":
+            _convert_libreoffice(pdf_path, output_path)
+            return ConvertResult(
+                success=True,
+                output_path=output_path,
+                message=f"Successfully converted PDF to DOCX: {output_path}"
+            )
 
-        cv.close()
+        if mode == "auto":
+            mode = select_mode(total_pages, file_size, fast_mode)
+        settings = FAST_MODE_SETTINGS if fast_mode else None
+
+        if mode == "single":
+            _convert_single(pdf_path, output_path, settings)
+        elif mode == "shard":
+            _convert_sharded(pdf_path, output_path, total_pages, settings)
+        else:
+            batch_count = _convert_batched(pdf_path, output_path, total_pages, settings, page_limit)
+            if batch_count > 1:
+                return ConvertResult(
+                    success=True,
+                    output_path=output_path,
+                    message=f"Successfully converted all {total_pages} pages to DOCX in {batch_count} batches: {output_path}"
+                )
 
-        return {
-            "success": True,
-            "output_path": output_path,
-            "message": f"Successfully converted PDF to DOCX: {output_path}"
-        }
+        return ConvertResult(
+            success=True,
+            output_path=output_path,
+            message=f"Successfully converted PDF to DOCX: {output_path}"
+        )
 
+    except (FileNotFoundError, PermissionError) as e:
+        return ConvertResult(
+            success=False,
+            error_type=type(e).__name__,
+            error_args=(e.filename,)
+        )
+    except OSError as e:
+        # str() of an OSError adds errno and filename, which are not in args
+        return ConvertResult(
+            success=False,
+            error_type=type(e).__name__,
+            error_args=(str(e),)
+        )
     except Exception as e:
-        return {
-            "success": False,
-            "error": f"Conversion failed: {str(e)}"
-        }
\ No newline at end of file
+        return ConvertResult(
+            success=False,
+            error_type=type(e).__name__,
+            error_args=e.args
+        )
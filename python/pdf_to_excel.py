@@ -4,14 +4,14 @@ Uses pdfplumber to extract tables from PDF (no Java required).
 Includes OCR support for image-based tables using RapidOCR (pure Python, no external dependencies).
 """
 import os
+import sys
 import pdfplumber
 import pandas as pd
 import fitz  # PyMuPDF
-from PIL import Image
-import io
 import numpy as np
-import concurrent.futures
 import multiprocessing
+import concurrent.futures
+import queue
 
 # OCR support using RapidOCR (pure Python, no Tesseract needed)
 try:
@@ -20,134 +20,180 @@ try:
 except ImportError:
     OCR_AVAILABLE = False
 
+# Pages are rendered at 2x zoom for better OCR quality
+_OCR_MATRIX = fitz.Matrix(2, 2)
 
-def process_single_page_ocr(args):
+# OCR engine owned by the current worker process (set by _init_ocr_worker).
+# Loading the ONNX models takes about a second, so it is done once per worker.
+_ocr_engine = None
+
+# Pre-loaded engines shared by threads when OCR runs in the current process
+_ocr_engine_pool = queue.Queue()
+
+
+def _init_ocr_worker():
     """
-    Process a single page with OCR.
-    Args must be a tuple (pdf_path, page_num) to be pickleable for multiprocessing.
+    ProcessPoolExecutor initializer: load one RapidOCR engine per worker process.
+    A failure must not escape: it would break the whole pool. The worker is
+    left without an engine and its pages are skipped instead.
     """
-    pdf_path, page_num = args
-    
+    global _ocr_engine
     try:
-        # Re-initialize OCR engine in each process
-        ocr = RapidOCR()
-        
-        doc = fitz.open(pdf_path)
-        if page_num < 0 or page_num >= len(doc):
-            doc.close()
-            return None
-            
-        page = doc[page_num]
-
-        # Render page to image at higher resolution for better OCR
-        mat = fitz.Matrix(2, 2)  # 2x zoom for better quality
-        pix = page.get_pixmap(matrix=mat)
-
-        # Convert to PIL Image
-        img_data = pix.tobytes("png")
-        img = Image.open(io.BytesIO(img_data))
-
-        # Convert to numpy array for RapidOCR
-        img_array = np.array(img)
-        
-        # Run OCR
-        result = ocr(img_array)
-        doc.close()
-
-        if result is None or len(result) == 0:
-            return None
-
-        # RapidOCR returns: (text_boxes, scores) or list of [box, text, score]
-        ocr_results = result[0] if isinstance(result, tuple) else result
-
-        if not ocr_results:
-            return None
-
-        # Group text by lines based on y position (top of bounding box)
-        lines = {}
-        for item in ocr_results:
-            if isinstance(item, (list, tuple)) and len(item) >= 2:
-                # Format: [box_points, text, score] or similar
-                box = item[0]  # [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-                text = item[1] if len(item) > 1 else ""
-
-                if not text or not text.strip():
-                    continue
+        _ocr_engine = RapidOCR()
+    except Exception as e:
+        _ocr_engine = None
+        print(f"[WARNING] OCR engine failed to load: {e}", file=sys.stderr, flush=True)
 
-                # Get top-left y coordinate for line grouping
-                if isinstance(box, (list, tuple)) and len(box) >= 4:
-                    top_y = min(box[0][1], box[1][1]) if isinstance(box[0], (list, tuple)) else box[1]
-                    left_x = min(box[0][0], box[3][0]) if isinstance(box[0], (list, tuple)) else box[0]
-                else:
-                    continue
 
-                # Group by approximate line (within 20 pixels)
-                line_key = int(top_y) // 25 * 25
-                if line_key not in lines:
-                    lines[line_key] = []
-                lines[line_key].append({
-                    'text': text.strip(),
-                    'left': left_x
-                })
-
-        if not lines:
-            return None
-
-        # Sort lines by y position
-        sorted_lines = sorted(lines.items())
-
-        # Detect columns based on x positions
-        all_lefts = []
-        for _, words in sorted_lines:
-            for word in words:
-                all_lefts.append(word['left'])
-
-        if not all_lefts:
-            return None
-
-        # Cluster x positions to find columns
-        all_lefts = sorted(set(all_lefts))
-        col_positions = [all_lefts[0]]
-        for left in all_lefts[1:]:
-            if left - col_positions[-1] > 80:  # New column if gap > 80px
-                col_positions.append(left)
-
-        # Build table rows
-        table_data = []
-        for _, words in sorted_lines:
-            # Sort words by x position
-            words = sorted(words, key=lambda w: w['left'])
-            row = [''] * len(col_positions)
-            for word in words:
-                # Find which column this word belongs to
-                col_idx = 0
-                for i, col_pos in enumerate(col_positions):
-                    if word['left'] >= col_pos - 40:
-                        col_idx = i
-                if col_idx < len(row):
-                    if row[col_idx]:
-                        row[col_idx] += ' ' + word['text']
-                    else:
-                        row[col_idx] = word['text']
-            if any(cell.strip() for cell in row):
-                table_data.append(row)
-
-        if len(table_data) > 1:  # Need at least header + 1 data row
-            # Use first row as header
-            headers = table_data[0] if table_data[0] else [f"Col{i+1}" for i in range(len(col_positions))]
-            df = pd.DataFrame(table_data[1:], columns=headers)
-            return {
-                "page": page_num + 1,
-                "data": df,
-                "source": "ocr"
-            }
-            
+def _acquire_ocr_engine():
+    """
+    Get an OCR engine: the worker's own engine, or one borrowed from the shared pool.
+    """
+    if _ocr_engine is not None:
+        return _ocr_engine
+    try:
+        return _ocr_engine_pool.get_nowait()
+    except queue.Empty:
+        return RapidOCR()
+
+
+def _release_ocr_engine(ocr):
+    """
+    Return an engine obtained from _acquire_ocr_engine() to the shared pool.
+    """
+    if ocr is not None and ocr is not _ocr_engine:
+        _ocr_engine_pool.put(ocr)
+
+
+def _ocr_page(doc, page_num: int, ocr):
+    """
+    Run OCR on one page of an open document and rebuild a table from the text boxes.
+    Returns a table dict, or None if the page has no usable table.
+    """
+    if page_num < 0 or page_num >= len(doc):
         return None
-        
-    except Exception as e:
-        # If OCR fails for this page, return None
+
+    page = doc[page_num]
+
+    # Render page to image at higher resolution for better OCR
+    # Grayscale is enough for OCR and is a third of the RGB pixmap size
+    pix = page.get_pixmap(matrix=_OCR_MATRIX, colorspace=fitz.csGRAY, alpha=False, annots=False)
+
+    # Wrap the raw samples as a 2D numpy array for RapidOCR (no PNG round-trip)
+    img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+    # Run OCR
+    result = ocr(img_array)
+
+    if result is None or len(result) == 0:
+        return None
+
+    # RapidOCR returns: (text_boxes, scores) or list of [box, text, score]
+    ocr_results = result[0] if isinstance(result, tuple) else result
+
+    if not ocr_results:
         return None
 
+    # Keep well-formed [box_points, text, score] items with non-empty text
+    items = [
+        item for item in ocr_results
+        if isinstance(item, (list, tuple)) and len(item) >= 2
+        and item[1] and item[1].strip()
+        and isinstance(item[0], (list, tuple)) and len(item[0]) >= 4
+    ]
+    if not items:
+        return None
+
+    boxes = np.array([item[0][:4] for item in items], dtype=np.float64)  # (N, 4, 2)
+    texts = [item[1].strip() for item in items]
+
+    # Top of each box for line grouping, left edge for column detection
+    tops = boxes[:, :2, 1].min(axis=1)
+    lefts = boxes[:, [0, 3], 0].min(axis=1)
+
+    # Group by approximate line (25px bands); order words top-to-bottom, then left-to-right
+    line_keys = np.floor_divide(tops.astype(np.int64), 25)
+    order = np.lexsort((lefts, line_keys))
+    _, row_ids = np.unique(line_keys[order], return_inverse=True)
+
+    # Cluster x positions to find columns: a new column starts more than 80px
+    # right of the previous column's start (greedy, so it runs over unique lefts only)
+    unique_lefts = np.unique(lefts)
+    col_positions = [unique_lefts[0]]
+    for left in unique_lefts[1:]:
+        if left - col_positions[-1] > 80:
+            col_positions.append(left)
+    col_positions = np.array(col_positions)
+
+    # A word belongs to the right-most column starting at most 40px right of it
+    col_ids = np.searchsorted(col_positions - 40, lefts[order], side="right") - 1
+    col_ids = np.clip(col_ids, 0, None)
+
+    # Build table rows
+    table_data = [[''] * len(col_positions) for _ in range(row_ids.max() + 1)]
+    for row_idx, col_idx, word_idx in zip(row_ids, col_ids, order):
+        cell = table_data[row_idx][col_idx]
+        table_data[row_idx][col_idx] = f"{cell} {texts[word_idx]}" if cell else texts[word_idx]
+    table_data = [row for row in table_data if any(cell.strip() for cell in row)]
+
+    if len(table_data) > 1:  # Need at least header + 1 data row
+        # Use first row as header
+        headers = table_data[0] if table_data[0] else [f"Col{i+1}" for i in range(len(col_positions))]
+        df = pd.DataFrame(table_data[1:], columns=headers)
+        return {
+            "page": page_num + 1,
+            "data": df,
+            "source": "ocr"
+        }
+
+    return None
+
+
+def process_page_range_ocr(args):
+    """
+    Process several adjacent pages with OCR, opening the document only once.
+    Args must be a tuple (pdf_path, page_nums) to be pickleable for multiprocessing.
+    Returns a list of table dicts.
+    """
+    pdf_path, page_nums = args
+    ocr = None
+    doc = None
+    tables = []
+
+    try:
+        # Reuse the engine loaded by the worker initializer (or a pooled one)
+        ocr = _acquire_ocr_engine()
+        doc = fitz.open(pdf_path)
+
+        for page_num in page_nums:
+            try:
+                table = _ocr_page(doc, page_num, ocr)
+            except Exception:
+                # If OCR fails for this page, skip it
+                continue
+            if table:
+                tables.append(table)
+
+    except Exception:
+        # If the document or engine cannot be loaded, return what we have
+        pass
+    finally:
+        if doc is not None:
+            doc.close()
+        _release_ocr_engine(ocr)
+
+    return tables
+
+
+def process_single_page_ocr(args):
+    """
+    Process a single page with OCR.
+    Args must be a tuple (pdf_path, page_num) to be pickleable for multiprocessing.
+    """
+    pdf_path, page_num = args
+    tables = process_page_range_ocr((pdf_path, [page_num]))
+    return tables[0] if tables else None
+
 
 def extract_tables_with_ocr(pdf_path: str, pages_to_process: list) -> list:
     """
@@ -162,26 +208,36 @@ def extract_tables_with_ocr(pdf_path: str, pages_to_process: list) -> list:
     Returns:
         List of extracted tables with page info
     """
-    if not OCR_AVAILABLE:
+    if not OCR_AVAILABLE or not pages_to_process:
         return []
 
     tables = []
     
-    # Prepare arguments for parallel processing
-    process_args = [(pdf_path, page_num) for page_num in pages_to_process]
-    
-    # Use ProcessPoolExecutor for parallel processing
+    # Use a process pool for parallel processing
     # Limit workers to avoid memory issues, but at least 2
     max_workers = min(multiprocessing.cpu_count(), 4)
+
+    # Split the pages into one contiguous range per worker, so every worker
+    # opens the document and loads its OCR engine exactly once
+    pages_per_worker = -(-len(pages_to_process) // max_workers)  # ceil division
+    process_args = [
+        (pdf_path, pages_to_process[i:i + pages_per_worker])
+        for i in range(0, len(pages_to_process), pages_per_worker)
+    ]
+    max_workers = len(process_args)
     
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-        results = list(executor.map(process_single_page_ocr, process_args))
-        
-    # Filter out None results
-    for result in results:
-        if result:
-            tables.append(result)
-            
+    # Each worker loads its OCR engine once and keeps it for all of its pages.
+    # Results are consumed as each range finishes instead of being collected
+    # into a list first. Unlike multiprocessing.Pool, the executor raises
+    # BrokenProcessPool if a worker dies (e.g. OOM-killed) rather than hanging.
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_ocr_worker) as executor:
+        futures = [executor.submit(process_page_range_ocr, args) for args in process_args]
+        for future in concurrent.futures.as_completed(futures):
+            tables.extend(future.result())
+
+    # Ranges complete in any order; keep sheets in page order
+    tables.sort(key=lambda t: t["page"])
+
     return tables
 
 
@@ -216,31 +272,46 @@ def convert(pdf_path: str, output_path: str | None = None, pages: str = "all", u
             os.makedirs(output_dir)
 
         tables = []
+        # Pages without a text layer (scanned images); only these are worth OCR
+        image_only_pages = set()
+
+        # Determine which pages to process before opening, so pdfplumber
+        # only builds page objects for the requested pages
+        if pages == "all":
+            pages_to_process = None
+            open_kwargs = {}
+        else:
+            # Parse page numbers (e.g., "1,2,3" or "1-3")
+            pages_to_process = []
+            for part in str(pages).split(","):
+                part = part.strip()
+                if "-" in part:
+                    start, end = part.split("-")
+                    pages_to_process.extend(range(int(start) - 1, int(end)))
+                else:
+                    try:
+                        pages_to_process.append(int(part) - 1)
+                    except ValueError:
+                        pass # Ignore invalid page numbers
+            # pdfplumber takes 1-indexed page numbers
+            open_kwargs = {"pages": [p + 1 for p in pages_to_process if p >= 0]}
 
         # Extract tables from PDF using pdfplumber
-        with pdfplumber.open(pdf_path) as pdf:
-            # Determine which pages to process
-            if pages == "all":
+        with pdfplumber.open(pdf_path, **open_kwargs) as pdf:
+            if pages_to_process is None:
                 pages_to_process = list(range(len(pdf.pages)))
-            else:
-                # Parse page numbers (e.g., "1,2,3" or "1-3")
-                pages_to_process = []
-                for part in str(pages).split(","):
-                    part = part.strip()
-                    if "-" in part:
-                        start, end = part.split("-")
-                        pages_to_process.extend(range(int(start) - 1, int(end)))
-                    else:
-                        try:
-                            pages_to_process.append(int(part) - 1)
-                        except ValueError:
-                            pass # Ignore invalid page numbers
+
+            # Only the requested pages are loaded; index them by original page number
+            loaded_pages = {page.page_number - 1: page for page in pdf.pages}
 
             for page_num in pages_to_process:
-                if page_num < 0 or page_num >= len(pdf.pages):
+                page = loaded_pages.get(page_num)
+                if page is None:
                     continue
 
-                page = pdf.pages[page_num]
+                if not page.chars:
+                    image_only_pages.add(page_num)
+
                 page_tables = page.extract_tables()
 
                 for table in page_tables:
@@ -254,22 +325,23 @@ def convert(pdf_path: str, output_path: str | None = None, pages: str = "all", u
                             "source": "pdfplumber"
                         })
 
-        # If no tables found and OCR is available and enabled, try OCR
-        if not tables and use_ocr and OCR_AVAILABLE:
-            try:
-                # Re-determine pages_to_process for OCR (need to close pdfplumber first)
-                with pdfplumber.open(pdf_path) as pdf:
-                    if pages == "all":
-                        pages_to_process = list(range(len(pdf.pages)))
-                    else:
-                        # Re-parse logic or just reuse existing pages_to_process if valid
-                        pass 
-
-                tables = extract_tables_with_ocr(pdf_path, pages_to_process)
-            except Exception as e:
-                # OCR failed, continue with empty tables
-                print(f"OCR failed: {e}")
-                pass
+        # If OCR is available and enabled: when pdfplumber found no tables at all,
+        # OCR every requested page (scans, or tables pdfplumber cannot detect such
+        # as borderless ones). Otherwise only OCR the pages without a text layer
+        # (scanned pages inside an otherwise digital PDF); digital text pages are
+        # left alone, as OCR would turn any multi-line prose into a "table".
+        if use_ocr and OCR_AVAILABLE:
+            ocr_pages = [p for p in dict.fromkeys(pages_to_process) if not tables or p in image_only_pages]
+            if ocr_pages:
+                try:
+                    tables.extend(extract_tables_with_ocr(pdf_path, ocr_pages))
+                except Exception as e:
+                    # OCR failed, continue with the pdfplumber tables
+                    print(f"[WARNING] OCR failed: {e}", file=sys.stderr, flush=True)
+
+                # Keep sheets in the requested page order
+                page_order = {p + 1: i for i, p in reversed(list(enumerate(pages_to_process)))}
+                tables.sort(key=lambda t: page_order.get(t['page'], 0))
 
         if not tables:
             error_msg = "No tables found in the PDF"
@@ -3,13 +3,146 @@ PDF to JPG converter module with fast mode.
 Optimized for large files and Cherry Studio compatibility.
 """
 import os
+import math
+import functools
 import fitz  # PyMuPDF
-from PIL import Image
-import io
 import sys
+import concurrent.futures
+import multiprocessing
 
+# Below this page count pages are rendered in-process instead of in a worker pool
+PARALLEL_MIN_PAGES = 4
 
-def convert(pdf_path: str, output_path: str | None = None, dpi: int = 72, quality: int = 85) -> dict:
+# Upper bound on rendered pixels per page (~75MB as an RGB pixmap)
+MAX_PAGE_PIXELS = 25_000_000
+
+# Document opened once by each worker process (set by _init_worker)
+_worker_doc = None
+_worker_pdf_path = None
+_worker_pages = 0
+
+# Worker documents are closed and reopened after this many pages: MuPDF keeps
+# per-document caches that store_shrink() does not release
+REOPEN_EVERY_PAGES = 50
+
+
+@functools.lru_cache(maxsize=16)
+def _matrix_for(dpi: float):
+    """
+    Render matrix for a DPI (72 is the default PDF DPI), cached across pages and calls.
+    The returned matrix is shared, so callers must not modify it.
+    """
+    zoom = dpi / 72.0
+    return fitz.Matrix(zoom, zoom)
+
+
+def _clamp_matrix(page, matrix, page_idx: int):
+    """
+    Scale the render matrix down if the page would exceed MAX_PAGE_PIXELS
+    at the requested DPI (e.g. large-format scans), to bound memory use.
+    """
+    rect = page.rect
+    pixels = rect.width * matrix.a * rect.height * matrix.d
+    if pixels <= MAX_PAGE_PIXELS:
+        return matrix
+
+    zoom = math.sqrt(MAX_PAGE_PIXELS / (rect.width * rect.height))
+    print(f"[INFO] Page {page_idx + 1} would be {pixels / 1e6:.0f} megapixels, "
+          f"rendering at {zoom * 72:.0f} DPI instead", file=sys.stderr, flush=True)
+    return fitz.Matrix(zoom, zoom)
+
+
+def _write_jpeg(pix, output_file: str, quality: int):
+    """
+    Write a pixmap as JPEG. Uses MuPDF's JPEG encoder directly; PyMuPDF
+    versions without JPEG output in tobytes() fall back to Pillow.
+    """
+    try:
+        jpeg_data = pix.tobytes("jpeg", jpg_quality=quality)
+    except (TypeError, ValueError):
+        pix.pil_save(output_file, format="JPEG", quality=quality, optimize=True)
+        return
+
+    with open(output_file, "wb") as f:
+        f.write(jpeg_data)
+
+
+def _save_page(doc, page_idx: int, matrix, quality: int, output_file: str, annots: bool = True) -> str | None:
+    """
+    Render one page of an open document and save it as JPG.
+    annots controls whether annotations (highlights, stamps, form fields) are drawn.
+    Returns the output file path, or None if the page failed.
+    """
+    try:
+        page = doc[page_idx]
+        matrix = _clamp_matrix(page, matrix, page_idx)
+
+        # Optimize rendering for speed
+        pix = page.get_pixmap(
+            matrix=matrix,
+            alpha=False,  # No alpha channel for faster processing
+            colorspace=fitz.csRGB,
+            annots=annots  # Skipping annotations is faster but drops them from the image
+        )
+
+        # Encode with MuPDF's own JPEG writer, no PIL round-trip
+        _write_jpeg(pix, output_file, quality)
+
+        # Clean up: dropping the reference alone does not return MuPDF's
+        # cached resources, so also empty the store between pages
+        del pix
+        fitz.TOOLS.store_shrink(100)
+
+        return output_file
+
+    except Exception as e:
+        # If a page fails, continue with next page
+        print(f"[WARNING] Failed to convert page {page_idx + 1}: {str(e)}", file=sys.stderr, flush=True)
+        return None
+
+
+def _init_worker(pdf_path: str):
+    """
+    ProcessPoolExecutor initializer: open the PDF once per worker process.
+    Documents are not pickleable, and re-opening per page would parse the
+    xref again for every page. Errors are caught so they don't break the pool.
+    """
+    global _worker_doc, _worker_pdf_path, _worker_pages
+    _worker_pdf_path = pdf_path
+    _worker_pages = 0
+    try:
+        _worker_doc = fitz.open(pdf_path)
+    except Exception as e:
+        _worker_doc = None
+        print(f"[WARNING] Failed to open PDF in worker: {str(e)}", file=sys.stderr, flush=True)
+
+
+def _worker_document():
+    """
+    Return the worker's document, reopening it every REOPEN_EVERY_PAGES pages.
+    """
+    global _worker_doc, _worker_pages
+    if _worker_doc is not None and _worker_pages >= REOPEN_EVERY_PAGES:
+        _worker_doc.close()
+        _init_worker(_worker_pdf_path)
+    _worker_pages += 1
+    return _worker_doc
+
+
+def _render_page(args):
+    """
+    Render a single page of the worker's document to JPG.
+    Args must be a tuple (page_idx, dpi, quality, output_file, annots) to be pickleable for multiprocessing.
+    """
+    page_idx, dpi, quality, output_file, annots = args
+    doc = _worker_document()
+    if doc is None:
+        return None
+    return _save_page(doc, page_idx, _matrix_for(dpi), quality, output_file, annots)
+
+
+def convert(pdf_path: str, output_path: str | None = None, dpi: int = 72, quality: int = 85, doc=None,
+            annots: bool = True) -> dict:
     """
     Convert PDF pages to JPG images with optimization options.
 
@@ -18,6 +151,9 @@ def convert(pdf_path: str, output_path: str | None = None, dpi: int = 72, qualit
         output_path: Optional output directory or file path pattern. If not provided, saves alongside the PDF.
         dpi: Image resolution (36-300 DPI). Lower values = faster conversion. Default: 72 (web standard)
         quality: JPEG quality (1-95). Lower values = smaller files, faster conversion. Default: 85
+        doc: Optional already-open fitz.Document for pdf_path. It is left open for the caller.
+        annots: Render annotations (highlights, stamps, form field appearances). Default: True.
+                False is somewhat faster for documents with many annotations.
 
     Returns:
         dict with status, output_paths, and message
@@ -29,12 +165,15 @@ def convert(pdf_path: str, output_path: str | None = None, dpi: int = 72, qualit
                 "error": f"PDF file not found: {pdf_path}"
             }
 
-        # Open PDF
-        doc = fitz.open(pdf_path)
+        # Open PDF unless the caller passed an open document
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(pdf_path)
         page_count = len(doc)
 
         if page_count == 0:
-            doc.close()
+            if owns_doc:
+                doc.close()
             return {
                 "success": False,
                 "error": "PDF has no pages"
@@ -45,7 +184,7 @@ def convert(pdf_path: str, output_path: str | None = None, dpi: int = 72, qualit
             base_name = os.path.splitext(pdf_path)[0]
             output_dir = os.path.dirname(pdf_path)
             output_pattern = os.path.join(output_dir, f"{os.path.basename(base_name)}_{{}}.jpg")
-        elif os.path.isdir(output_path):
+        elif os.path.isdir(output_path) or output_path.endswith(os.sep):
             # If output_path is a directory, use it with default pattern
             base_name = os.path.splitext(os.path.basename(pdf_path))[0]
             output_pattern = os.path.join(output_path, f"{base_name}_{{}}.jpg")
@@ -64,53 +203,42 @@ def convert(pdf_path: str, output_path: str | None = None, dpi: int = 72, qualit
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        # Calculate zoom factor based on DPI
-        zoom = dpi / 72.0
-        matrix = fitz.Matrix(zoom, zoom)
+        # Render matrix for the requested DPI
+        matrix = _matrix_for(dpi)
 
         # Process pages with optimizations
         output_paths = []
         batch_size = 5  # Process 5 pages at a time for progress feedback
 
-        for i in range(page_count):
-            try:
-                page = doc[i]
-
-                # Optimize rendering for speed
-                pix = page.get_pixmap(
-                    matrix=matrix,
-                    alpha=False,  # No alpha channel for faster processing
-                    colorspace=fitz.csRGB,
-                    annots=False  # Skip annotations for speed
-                )
-
-                # Convert to PIL Image and save as JPG with compression
-                img_data = pix.tobytes("png")
-                img = Image.open(io.BytesIO(img_data))
-
-                # Convert to RGB if needed
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                # Save as JPG with specified quality
-                output_file = output_pattern.format(i + 1)
-                img.save(output_file, 'JPEG', quality=quality, optimize=True)
-                output_paths.append(output_file)
+        if page_count < PARALLEL_MIN_PAGES:
+            # Small documents: render in-process, pool startup would dominate
+            for i in range(page_count):
+                output_file = _save_page(doc, i, matrix, quality, output_pattern.format(i + 1), annots)
+                if output_file:
+                    output_paths.append(output_file)
 
                 # Print progress for large files
                 if (i + 1) % batch_size == 0 or i == page_count - 1:
                     print(f"[INFO] Converted {i + 1}/{page_count} pages to JPG", file=sys.stderr, flush=True)
+            if owns_doc:
+                doc.close()
+        else:
+            # Documents are not pickleable, so each worker opens the file once
+            if owns_doc:
+                doc.close()
+            render_args = [(i, dpi, quality, output_pattern.format(i + 1), annots) for i in range(page_count)]
+            max_workers = min(multiprocessing.cpu_count(), 8)
+            chunksize = max(1, page_count // (4 * max_workers))
 
-                # Clean up
-                pix = None
-                img = None
-
-            except Exception as e:
-                # If a page fails, continue with next page
-                print(f"[WARNING] Failed to convert page {i+1}: {str(e)}", file=sys.stderr, flush=True)
-                continue
+            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                                        initargs=(pdf_path,)) as executor:
+                for i, output_file in enumerate(executor.map(_render_page, render_args, chunksize=chunksize)):
+                    if output_file:
+                        output_paths.append(output_file)
 
-        doc.close()
+                    # Print progress for large files
+                    if (i + 1) % batch_size == 0 or i == page_count - 1:
+                        print(f"[INFO] Converted {i + 1}/{page_count} pages to JPG", file=sys.stderr, flush=True)
 
         if not output_paths:
             return {
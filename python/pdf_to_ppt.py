@@ -6,19 +6,119 @@ Optimized for Cherry Studio with better performance.
 import os
 import tempfile
 import sys
+import concurrent.futures
+import multiprocessing
+import functools
 import fitz  # PyMuPDF
 from pptx import Presentation
 from pptx.util import Inches
 
+# Below this page count pages are rendered in-process instead of in a worker pool
+PARALLEL_MIN_PAGES = 4
 
-def convert(pdf_path: str, output_path: str | None = None, dpi: int = 150) -> dict:
+# Document opened once by each worker process (set by _init_worker)
+_worker_doc = None
+_worker_pdf_path = None
+_worker_pages = 0
+
+# Worker documents are closed and reopened after this many pages: MuPDF keeps
+# per-document caches that store_shrink() does not release
+REOPEN_EVERY_PAGES = 50
+
+
+@functools.lru_cache(maxsize=16)
+def _matrix_for(dpi: float):
+    """
+    Render matrix for a DPI (72 is the default PDF DPI), cached across pages and calls.
+    The returned matrix is shared, so callers must not modify it.
+    """
+    zoom = dpi / 72.0
+    return fitz.Matrix(zoom, zoom)
+
+
+def _save_page_jpg(doc, page_idx: int, matrix, temp_dir: str) -> tuple | None:
+    """
+    Render one page of an open document to a JPEG in temp_dir.
+    Returns (page_idx, img_path, width, height), or None if the page failed.
+    """
+    try:
+        page = doc[page_idx]
+
+        # Optimize rendering settings for performance
+        pix = page.get_pixmap(
+            matrix=matrix,
+            alpha=False,  # No alpha channel for faster processing
+            colorspace=fitz.csRGB  # Use RGB for better compatibility
+        )
+
+        # Save image temporarily as JPEG (much faster and smaller than PNG)
+        img_path = os.path.join(temp_dir, f"page_{page_idx + 1}.jpg")
+        pix.pil_save(img_path, format="JPEG", quality=85, optimize=True)
+
+        width, height = pix.width, pix.height
+
+        # Clean up: dropping the reference alone does not return MuPDF's
+        # cached resources, so also empty the store between pages
+        del pix
+        fitz.TOOLS.store_shrink(100)
+
+        return (page_idx, img_path, width, height)
+
+    except Exception as e:
+        # If a page fails, continue with next page
+        print(f"[WARNING] Failed to process page {page_idx + 1}: {str(e)}", file=sys.stderr, flush=True)
+        return None
+
+
+def _init_worker(pdf_path: str):
+    """
+    ProcessPoolExecutor initializer: open the PDF once per worker process.
+    Documents are not pickleable, and re-opening per page would parse the
+    xref again for every page. Errors are caught so they don't break the pool.
+    """
+    global _worker_doc, _worker_pdf_path, _worker_pages
+    _worker_pdf_path = pdf_path
+    _worker_pages = 0
+    try:
+        _worker_doc = fitz.open(pdf_path)
+    except Exception as e:
+        _worker_doc = None
+        print(f"[WARNING] Failed to open PDF in worker: {str(e)}", file=sys.stderr, flush=True)
+
+
+def _worker_document():
+    """
+    Return the worker's document, reopening it every REOPEN_EVERY_PAGES pages.
+    """
+    global _worker_doc, _worker_pages
+    if _worker_doc is not None and _worker_pages >= REOPEN_EVERY_PAGES:
+        _worker_doc.close()
+        _init_worker(_worker_pdf_path)
+    _worker_pages += 1
+    return _worker_doc
+
+
+def _render_page_to_jpg(args):
+    """
+    Render a single page of the worker's document to a JPEG.
+    Args must be a tuple (page_idx, dpi, temp_dir) to be pickleable for multiprocessing.
+    """
+    page_idx, dpi, temp_dir = args
+    doc = _worker_document()
+    if doc is None:
+        return None
+    return _save_page_jpg(doc, page_idx, _matrix_for(dpi), temp_dir)
+
+
+def convert(pdf_path: str, output_path: str | None = None, dpi: int = 110, doc=None) -> dict:
     """
     Convert PDF to PowerPoint by converting pages to images.
 
     Args:
         pdf_path: Path to the input PDF file
         output_path: Optional output path. If not provided, uses same directory as PDF.
-        dpi: Image resolution. Default is 150 for good quality.
+        dpi: Image resolution. Default is 110, a balance of slide quality and speed.
+        doc: Optional already-open fitz.Document for pdf_path. It is left open for the caller.
 
     Returns:
         dict with status, output_path, and message
@@ -40,12 +140,15 @@ def convert(pdf_path: str, output_path: str | None = None, dpi: int = 150) -> di
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        # Open PDF with PyMuPDF
-        doc = fitz.open(pdf_path)
+        # Open PDF with PyMuPDF unless the caller passed an open document
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(pdf_path)
         page_count = len(doc)
 
         if page_count == 0:
-            doc.close()
+            if owns_doc:
+                doc.close()
             return {
                 "success": False,
                 "error": "PDF has no pages"
@@ -58,32 +161,34 @@ def convert(pdf_path: str, output_path: str | None = None, dpi: int = 150) -> di
         prs.slide_width = Inches(13.333)
         prs.slide_height = Inches(7.5)
 
-        # Calculate zoom factor based on DPI
-        zoom = dpi / 72.0
-        matrix = fitz.Matrix(zoom, zoom)
+        # Render matrix for the requested DPI
+        matrix = _matrix_for(dpi)
 
         # Process pages in batches for better memory management
         batch_size = 10  # Process 10 pages at a time
 
         with tempfile.TemporaryDirectory() as temp_dir:
-            for i in range(page_count):
+            # Phase 1: render every page to a JPEG in the temp dir
+            if page_count < PARALLEL_MIN_PAGES:
+                rendered = [_save_page_jpg(doc, i, matrix, temp_dir) for i in range(page_count)]
+                if owns_doc:
+                    doc.close()
+            else:
+                # Documents are not pickleable, so each worker opens the file once
+                if owns_doc:
+                    doc.close()
+                render_args = [(i, dpi, temp_dir) for i in range(page_count)]
+                max_workers = min(multiprocessing.cpu_count(), 8)
+                chunksize = max(1, page_count // (4 * max_workers))
+
+                with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                                            initargs=(pdf_path,)) as executor:
+                    rendered = list(executor.map(_render_page_to_jpg, render_args, chunksize=chunksize))
+
+            # Phase 2: build slides serially in page order (python-pptx is not thread-safe)
+            rendered = sorted((r for r in rendered if r), key=lambda r: r[0])
+            for i, img_path, img_width, img_height in rendered:
                 try:
-                    page = doc[i]
-
-                    # Optimize rendering settings for performance
-                    pix = page.get_pixmap(
-                        matrix=matrix,
-                        alpha=False,  # No alpha channel for faster processing
-                        colorspace=fitz.csRGB  # Use RGB for better compatibility
-                    )
-
-                    # Save image temporarily
-                    img_path = os.path.join(temp_dir, f"page_{i + 1}.png")
-                    pix.save(img_path)
-
-                    # Get image dimensions
-                    img_width = pix.width
-                    img_height = pix.height
                     aspect_ratio = img_width / img_height
 
                     # Add blank slide
@@ -119,8 +224,6 @@ def convert(pdf_path: str, output_path: str | None = None, dpi: int = 150) -> di
                     print(f"[WARNING] Failed to process page {i+1}: {str(e)}", file=sys.stderr, flush=True)
                     continue
 
-        doc.close()
-
         # Save presentation
         prs.save(output_path)
 
@@ -68,6 +68,11 @@ const TOOLS = [
           type: "boolean",
           description: "Optional: Use fast mode for better performance (slightly lower quality). Default: false",
         },
+        engine: {
+          type: "string",
+          enum: ["pdf2docx", "libreoffice"],
+          description: "Optional: Conversion engine. 'libreoffice' (requires LibreOffice installed) is faster on text-heavy PDFs but preserves layout less faithfully. Default: pdf2docx",
+        },
       },
       required: ["pdf_path"],
     },
@@ -102,7 +107,7 @@ const TOOLS = [
   {
     name: "pdf_to_ppt",
     description:
-      "[PDF2All] Convert PDF to PowerPoint (.pptx) format. Each page becomes a slide with the page rendered as an image at 150 DPI. Ideal for presentations and slide decks.",
+      "[PDF2All] Convert PDF to PowerPoint (.pptx) format. Each page becomes a slide with the page rendered as an image at 110 DPI. Ideal for presentations and slide decks.",
     inputSchema: {
       type: "object" as const,
       properties: {
@@ -116,7 +121,7 @@ const TOOLS = [
         },
         dpi: {
           type: "number",
-          description: "Optional: Image resolution (75-300 DPI). Lower values = faster conversion. Default: 150",
+          description: "Optional: Image resolution (75-300 DPI). Lower values = faster conversion. Default: 110",
         },
       },
       required: ["pdf_path"],
@@ -165,7 +170,8 @@ async function executePythonConverter(
   dpi?: number,
   quality?: number,
   pages?: string,
-  useOcr?: boolean
+  useOcr?: boolean,
+  engine?: string
 ): Promise<{ success: boolean;[key: string]: unknown }> {
   return new Promise((resolve) => {
     const request = {
@@ -177,6 +183,7 @@ async function executePythonConverter(
       ...(quality !== undefined && action === "pdf_to_jpg" && { quality }),
       ...(pages !== undefined && action === "pdf_to_excel" && { pages }),
       ...(useOcr !== undefined && action === "pdf_to_excel" && { use_ocr: useOcr }),
+      ...(engine !== undefined && action === "pdf_to_docx" && { engine }),
     };
 
     const pythonCmd = process.env.PYTHON_PATH || "python";
@@ -553,6 +560,7 @@ function createServer(baseUrl?: string, publicDir?: string): Server {
     const quality = (args as { quality?: number })?.quality;
     const pages = (args as { pages?: string })?.pages;
     const useOcr = (args as { use_ocr?: boolean })?.use_ocr;
+    const engine = (args as { engine?: string })?.engine;
 
     // Manual validation for input source
     if (!pdfPathArg && !pdfUrl && !pdfBase64) {
@@ -575,7 +583,7 @@ function createServer(baseUrl?: string, publicDir?: string): Server {
       // Execute conversion
       // Note: If isTemp is true, we might want to ensure output path is also temp if not specified?
       // The python script defaults to saving alongside input. If input is in temp, output will      // Execute conversion
-      const result = await executePythonConverter(name, inputPath, outputPath, fastMode, dpi, quality, pages, useOcr);
+      const result = await executePythonConverter(name, inputPath, outputPath, fastMode, dpi, quality, pages, useOcr, engine);
       console.error("DEBUG: result keys:", Object.keys(result));
       if (result.output_paths) console.error("DEBUG: output_paths length:", (result.output_paths as any[]).length);
 